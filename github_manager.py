@@ -6,8 +6,16 @@ import re
 import shutil
 import subprocess
 import json
+import hashlib
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from github import Github, GithubException
 
+DOWNLOAD_DIR = "run-downloads"
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_PARALLEL_DOWNLOADS = 4
+MAX_DOWNLOAD_ATTEMPTS = 3
+
 def select_repository(repo_choices):
     """Allow user to select a repository from the cached list"""
     if not repo_choices:
@@ -40,6 +48,179 @@ def select_repository(repo_choices):
         print(f"❌ Error selecting repository: {str(e)}")
         return None
 
+def stream_download(url, headers, dest_path, resume=True):
+    """Stream a URL to disk, resuming a partial download with HTTP range requests"""
+    part_path = dest_path + ".part"
+
+    for attempt in range(1, MAX_DOWNLOAD_ATTEMPTS + 1):
+        if not resume and os.path.exists(part_path):
+            os.unlink(part_path)
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        request_headers = dict(headers)
+        if offset:
+            request_headers["Range"] = f"bytes={offset}-"
+
+        try:
+            # Authorization is dropped by requests when redirected to blob storage
+            with requests.get(url, headers=request_headers, stream=True, timeout=60) as response:
+                if response.status_code == 416:
+                    # "bytes */<total>" tells whether the partial file is already complete
+                    content_range = response.headers.get("Content-Range", "")
+                    total = content_range.rsplit("/", 1)[-1]
+                    if content_range.startswith("bytes */") and total.isdigit() and int(total) == offset:
+                        os.replace(part_path, dest_path)
+                        return offset
+
+                    # Partial file no longer matches the remote body, start over
+                    os.unlink(part_path)
+                    continue
+                response.raise_for_status()
+
+                if response.status_code == 206:
+                    # Only append when the body continues exactly where the partial file ends
+                    match = re.match(r'bytes (\d+)-', response.headers.get("Content-Range", ""))
+                    if not match or int(match.group(1)) != offset:
+                        os.unlink(part_path)
+                        continue
+
+                # Servers that ignore the range send the full body again
+                mode = "ab" if response.status_code == 206 else "wb"
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+
+            os.replace(part_path, dest_path)
+            return offset if mode == "ab" else 0
+
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+            if attempt == MAX_DOWNLOAD_ATTEMPTS:
+                raise
+            time.sleep(2 * attempt)
+
+    raise RuntimeError(f"Download did not complete after {MAX_DOWNLOAD_ATTEMPTS} attempts")
+
+def file_sha256(path):
+    """Compute the SHA-256 hex digest of a file without loading it into memory"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def extract_archive(zip_path, dest_dir):
+    """Extract a downloaded zip archive member by member, moving it into place once complete"""
+    # A partial extraction stays in the temp directory and never looks finished
+    os.makedirs(os.path.dirname(dest_dir), exist_ok=True)
+    temp_dir = tempfile.mkdtemp(prefix=".extract-", dir=os.path.dirname(dest_dir))
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            for member in archive.infolist():
+                archive.extract(member, temp_dir)
+
+        if os.path.isdir(dest_dir):
+            shutil.rmtree(dest_dir)
+        os.replace(temp_dir, dest_dir)
+    except Exception:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+
+def zip_is_valid(zip_path):
+    """Check that a zip archive opens and every member passes its CRC check"""
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            return archive.testzip() is None
+    except zipfile.BadZipFile:
+        return False
+
+def list_run_artifacts(full_name, run_id, headers):
+    """Fetch every artifact attached to a workflow run, following pagination"""
+    artifacts = []
+    url = f"https://api.github.com/repos/{full_name}/actions/runs/{run_id}/artifacts?per_page=100"
+    while url:
+        response = requests.get(url, headers=headers, timeout=60)
+        response.raise_for_status()
+        artifacts.extend(response.json().get("artifacts", []))
+        url = response.links.get("next", {}).get("url")
+    return artifacts
+
+def download_run_logs(full_name, run_id, attempt, completed, headers, run_dir, extract):
+    """Download the log archive of one attempt of a workflow run"""
+    # Each attempt has its own immutable archive, so skipping and resuming
+    # never mix logs from a re-run with those of an earlier attempt
+    url = f"https://api.github.com/repos/{full_name}/actions/runs/{run_id}/attempts/{attempt}/logs"
+    label = f"logs-attempt-{attempt}"
+
+    # Logs of a running workflow keep changing, so snapshots are stored
+    # separately and never resumed into the final archive
+    if not completed:
+        zip_path = os.path.join(run_dir, f"{label}-in-progress.zip")
+        stream_download(url, headers, zip_path, resume=False)
+        if extract:
+            extract_archive(zip_path, os.path.join(run_dir, "extracted", f"{label}-in-progress"))
+        return f"⬇️ Run {run_id} attempt {attempt} logs (in progress snapshot): {zip_path}"
+
+    zip_path = os.path.join(run_dir, f"{label}.zip")
+    extract_dir = os.path.join(run_dir, "extracted", label)
+
+    if os.path.exists(zip_path) and zipfile.is_zipfile(zip_path):
+        if extract and not os.path.isdir(extract_dir):
+            extract_archive(zip_path, extract_dir)
+        return f"⏭️ Run {run_id} attempt {attempt} logs: already present, skipped"
+
+    resumed_from = stream_download(url, headers, zip_path)
+
+    if not zip_is_valid(zip_path):
+        os.unlink(zip_path)
+        raise ValueError("log archive is not a valid zip file")
+
+    if extract:
+        extract_archive(zip_path, extract_dir)
+
+    note = f" (resumed at {resumed_from} bytes)" if resumed_from else ""
+    return f"⬇️ Run {run_id} attempt {attempt} logs: {zip_path}{note}"
+
+def download_artifact(full_name, run_id, artifact, headers, run_dir, extract):
+    """Download one artifact, skipping it when a matching copy is already on disk"""
+    name = artifact["name"]
+    if artifact.get("expired"):
+        return f"⚠️ Run {run_id} artifact {name}: expired, skipped"
+
+    # Keep artifacts apart from the run logs, and prefix the id so names that
+    # sanitize to the same string never share a path
+    artifacts_dir = os.path.join(run_dir, "artifacts")
+    os.makedirs(artifacts_dir, exist_ok=True)
+    safe_name = f"{artifact['id']}-" + re.sub(r'[^a-zA-Z0-9_.-]', '_', name)
+    zip_path = os.path.join(artifacts_dir, f"{safe_name}.zip")
+    extract_dir = os.path.join(run_dir, "extracted", "artifacts", safe_name)
+
+    # Artifacts uploaded with upload-artifact v4 or later report a "sha256:<hex>"
+    # digest of the zip. Earlier ones have none, and their size_in_bytes is the
+    # uncompressed size, so a zip that opens cleanly is the best check available
+    expected = (artifact.get("digest") or "").split(":", 1)[-1].lower()
+
+    def matches_remote():
+        if expected:
+            return file_sha256(zip_path) == expected
+        return zip_is_valid(zip_path)
+
+    if os.path.exists(zip_path) and matches_remote():
+        if extract and not os.path.isdir(extract_dir):
+            extract_archive(zip_path, extract_dir)
+        return f"⏭️ Run {run_id} artifact {name}: already present, skipped"
+
+    url = f"https://api.github.com/repos/{full_name}/actions/artifacts/{artifact['id']}/zip"
+    resumed_from = stream_download(url, headers, zip_path)
+
+    if not matches_remote():
+        os.unlink(zip_path)
+        raise ValueError(f"artifact {name} failed digest verification")
+
+    if extract:
+        extract_archive(zip_path, extract_dir)
+
+    note = f" (resumed at {resumed_from} bytes)" if resumed_from else ""
+    return f"⬇️ Run {run_id} artifact {name}: {zip_path}{note}"
+
 def main():
     # Load configuration
     token = os.getenv('GITHUB_TOKEN')
@@ -54,6 +235,8 @@ def main():
     source_url = os.getenv('SOURCE_URL')
     repo_visibility = os.getenv('REPO_VISIBILITY', 'private').lower()
     repo_choices = os.getenv('REPO_CHOICES', '[]')
+    run_ids = os.getenv('RUN_IDS')
+    extract_downloads = os.getenv('EXTRACT_DOWNLOADS', 'false').lower() == 'true'
     
     # Validate inputs
     if not token:
@@ -478,6 +661,91 @@ def main():
             except GithubException as e:
                 print(f"❌ Error canceling workflows: {e.data.get('message', str(e))}")
                 
+        elif operation == "download_run_outputs":
+            if not repo_name:
+                print("❌ Repository name required to download run outputs")
+                return
+            try:
+                repo = target.get_repo(repo_name)
+                
+                # Resolve requested runs, defaulting to the most recent one
+                failed_runs = 0
+                runs = []
+                if run_ids:
+                    # Duplicate ids would have two workers writing the same files
+                    requested = list(dict.fromkeys(rid.strip() for rid in run_ids.split(',') if rid.strip()))
+                    invalid = [rid for rid in requested if not rid.isdigit()]
+                    if invalid:
+                        print(f"❌ Invalid run IDs: {', '.join(invalid)}")
+                        return
+                    for rid in requested:
+                        try:
+                            runs.append(repo.get_workflow_run(int(rid)))
+                        except GithubException as e:
+                            failed_runs += 1
+                            print(f"   ❌ Failed run {rid} lookup: {e.data.get('message', str(e))}")
+                else:
+                    all_runs = repo.get_workflow_runs()
+                    runs = [all_runs[0]] if all_runs.totalCount > 0 else []
+                
+                if not runs:
+                    print("❌ No workflow runs found to download")
+                    return
+                
+                # Record this invocation's runs so the workflow only keeps and uploads those
+                with open('run-downloads.json', 'w') as f:
+                    json.dump([f"run-{run.id}" for run in runs], f)
+                
+                headers = {
+                    "Authorization": f"token {token}",
+                    "Accept": "application/vnd.github.v3+json",
+                    "X-GitHub-Api-Version": "2022-11-28"
+                }
+                
+                # Queue logs and artifacts of every run for concurrent download
+                print(f"📥 Downloading outputs of {len(runs)} run(s) to {DOWNLOAD_DIR}/")
+                with ThreadPoolExecutor(max_workers=MAX_PARALLEL_DOWNLOADS) as executor:
+                    futures = {}
+                    for run in runs:
+                        run_dir = os.path.join(DOWNLOAD_DIR, f"run-{run.id}")
+                        os.makedirs(run_dir, exist_ok=True)
+                        print(f"   - Run {run.id}: {run.status} | {run.html_url}")
+                        if run.status != "completed":
+                            print("     ⚠️ Run still in progress, logs may be unavailable")
+                        
+                        future = executor.submit(download_run_logs, repo.full_name, run.id, run.raw_data.get("run_attempt", 1), run.status == "completed", headers, run_dir, extract_downloads)
+                        futures[future] = f"run {run.id} logs"
+                        
+                        try:
+                            artifacts = list_run_artifacts(repo.full_name, run.id, headers)
+                        except requests.RequestException as e:
+                            failed_runs += 1
+                            print(f"   ❌ Failed run {run.id} artifact listing: {str(e)}")
+                            continue
+                        
+                        for artifact in artifacts:
+                            future = executor.submit(download_artifact, repo.full_name, run.id, artifact, headers, run_dir, extract_downloads)
+                            futures[future] = f"run {run.id} artifact {artifact['name']}"
+                    
+                    failed_count = 0
+                    for future in as_completed(futures):
+                        try:
+                            print(f"   {future.result()}")
+                        except Exception as e:
+                            failed_count += 1
+                            print(f"   ❌ Failed {futures[future]}: {str(e)}")
+                
+                print(f"\n✅ Finished {len(futures) - failed_count}/{len(futures)} downloads")
+                if failed_runs:
+                    print(f"   ⚠️ {failed_runs} run(s) could not be looked up or listed")
+                if failed_count or failed_runs:
+                    print("   Re-run the operation to resume failed downloads")
+                
+            except GithubException as e:
+                print(f"❌ Error downloading run outputs: {e.data.get('message', str(e))}")
+            except requests.RequestException as e:
+                print(f"❌ Error fetching run artifacts: {str(e)}")
+                
         elif operation == "clone_repo":
             if not source_url:
                 print("❌ Source URL required for cloning")
@@ -645,7 +913,8 @@ def main():
                 "run_workflow",
                 "cancel_workflows",
                 "clone_repo",
-                "rename_repo"
+                "rename_repo",
+                "download_run_outputs"
             ]
             print(f"❌ Unsupported operation: {operation}")
             print(f"   Supported operations: {', '.join(supported_ops)}")